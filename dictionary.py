@@ -1,5 +1,9 @@
+import hashlib
 import json
+import os
+import uuid
 import dotenv
+import orjson
 
 from epub import *
 from provider import *
@@ -8,33 +12,105 @@ from utils.utils import *
 
 dotenv.load_dotenv(".env")
 
+_DICTIONARY_ORDERED_KEYS = ("characters", "groups")
+_DICTIONARY_KEYS = frozenset(_DICTIONARY_ORDERED_KEYS)
+# 사전을 생성한 EPUB 파일의 SHA-256. 같은 책을 다시 실행할 때 사전을 그대로 재사용할지 판단하는 데 사용
+EPUB_FINGERPRINT_KEY = "_epub_sha256"
+
 # --------------------------------
 # 공용 함수
 # --------------------------------
 
-def load_full_text_from_epub(epub_extracted: Epub) -> str:
-    full_text = text_from_epub(epub_extracted)
-    full_text = trim_ruby_text(full_text)
+def load_full_text_from_epub(epub_extracted: Epub, max_chars: int | None = None) -> str:
+    """
+    캐릭터 사전 생성에 사용할 EPUB 전체 텍스트를 불러옵니다.
+
+    :param epub_extracted: 추출이 완료된 Epub 객체
+    :param max_chars: 최대 글자 수. 지정하면 이 길이에 도달하는 즉시 추출을 멈추며, 미리 제출된 몇 챕터 외에는 파싱하지 않음
+    :returns: 챕터 텍스트를 빈 줄로 이어 붙인 문자열
+    """
+    if max_chars is None:
+        full_text = text_from_epub(epub_extracted)
+    else:
+        parts: list[str] = []
+        total = 0
+        for chapter_text in iter_chapter_texts(epub_extracted):
+            parts.append(chapter_text)
+            total += len(chapter_text) + 2
+            if total >= max_chars:
+                break
+        full_text = "\n\n".join(parts).strip()[:max_chars]
+
     if not full_text.strip():
         raise ValueError("EPUB에서 추출한 텍스트가 비어 있습니다.")
 
     return full_text
 
+def epub_fingerprint(epub_path: Path) -> str:
+    """
+    EPUB 파일 내용의 SHA-256 해시를 반환합니다.
+
+    :param epub_path: EPUB 파일 경로
+    :returns: 16진수 해시 문자열
+    """
+    with open(epub_path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+def dump_dictionary_json(char_dict: dict, compact: bool = False) -> str:
+    """
+    캐릭터 사전을 JSON 문자열로 직렬화합니다. (비 ASCII 문자는 그대로 유지)
+
+    :param char_dict: 캐릭터 사전
+    :param compact: True면 공백 없이 직렬화하고 EPUB 지문 필드를 제외 (프롬프트 삽입용), False면 2칸 들여쓰기 (파일 저장용)
+    :returns: JSON 문자열
+    """
+    if compact:
+        char_dict = {k: v for k, v in char_dict.items() if k != EPUB_FINGERPRINT_KEY}
+    return orjson.dumps(char_dict, option=None if compact else orjson.OPT_INDENT_2).decode("utf-8")
+
+def save_dictionary_file(path: Path, char_dict: dict) -> None:
+    """
+    캐릭터 사전을 JSON 파일로 저장합니다.
+    임시 파일에 한 번에 쓴 뒤 os.replace로 교체하므로, 저장 도중 중단되어도 기존 파일이 깨지지 않습니다.
+    임시 파일 이름은 호출마다 달라서 같은 사전을 동시에 저장해도 서로의 임시 파일을 덮어쓰지 않습니다.
+
+    :param path: 저장할 파일 경로
+    :param char_dict: 캐릭터 사전
+    """
+    data = dump_dictionary_json(char_dict).encode("utf-8")
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, "xb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+def load_dictionary_file(path: Path) -> dict | list:
+    """
+    캐릭터 사전 JSON 파일을 구조 검증 없이 불러옵니다. (대시보드 편집기 표시용)
+
+    :param path: 사전 파일 경로
+    :returns: 파싱된 JSON 값
+    :raises json.JSONDecodeError: 유효한 JSON이 아닌 경우
+    """
+    return orjson.loads(path.read_bytes())
+
 def parse_dictionary_json(response_text: str) -> dict:
     try:
-        parsed = json.loads(response_text)
-    except json.JSONDecodeError as e:
+        parsed = orjson.loads(response_text)
+    except json.JSONDecodeError as e:  # orjson.JSONDecodeError는 json.JSONDecodeError의 하위 클래스
         raise AssertionError(f"응답이 유효한 JSON이 아닙니다: {e}\n원문:\n{response_text}") from e
 
     if not isinstance(parsed, dict):
         raise AssertionError("최상위 JSON은 object여야 합니다.")
-    if "characters" not in parsed:
-        raise AssertionError("characters 키가 필요합니다.")
-    if "groups" not in parsed:
-        raise AssertionError("groups 키가 필요합니다.")
-    if not isinstance(parsed["characters"], list):
-        raise AssertionError("characters는 배열이어야 합니다.")
-    if not isinstance(parsed["groups"], list):
-        raise AssertionError("groups는 배열이어야 합니다.")
+    # 정상 응답은 한 번의 집합 비교로 통과시키고, 실패한 경우에만 원인 키를 찾음
+    if not parsed.keys() >= _DICTIONARY_KEYS:
+        missing = next(key for key in _DICTIONARY_ORDERED_KEYS if key not in parsed)
+        raise AssertionError(f"{missing} 키가 필요합니다.")
+    if not (isinstance(parsed["characters"], list) and isinstance(parsed["groups"], list)):
+        invalid = next(key for key in _DICTIONARY_ORDERED_KEYS if not isinstance(parsed[key], list))
+        raise AssertionError(f"{invalid}는 배열이어야 합니다.")
 
     return parsed
@@ -1,19 +1,42 @@
+import os
 import re
+import shutil
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Callable
+from typing import Callable, Iterator
 import zipfile
 import logging
 import concurrent.futures
+import functools
+import collections
+import itertools
 
 from tqdm import tqdm
 
 from bs4 import BeautifulSoup, element
 from bs4.element import NavigableString, Tag
+from lxml import etree
 
 from exceptions import *
 
 _XHTML_MULTI_VALUED_ATTRS: dict[str, list[str]] = {"*": ["class"]}
+# OPF 네임스페이스가 없거나 다른 OPF도 기존처럼 읽을 수 있도록 네임스페이스와 무관하게 로컬 이름으로 매칭
+_OPF_ITERPARSE_TAGS = tuple(f"{{*}}{name}" for name in ('manifest', 'spine', 'item', 'itemref'))
+_RUBY_RE = re.compile(r'<ruby>(.*?)<rt>(.*?)</rt></ruby>', re.DOTALL)
+_MEDIA_TYPE_RE = re.compile(r'application/(xhtml\+xml|x-dtbook\+xml)', re.IGNORECASE)
+# 줄 단위 [index] 마커. 여러 줄 텍스트 전체를 한 번에 스캔하므로 공백 매칭이 줄바꿈을 넘지 않도록 함
+_MARKER_LINE_RE = re.compile(r'^\[(\d+)\][^\S\n]*(.*)$', re.MULTILINE)
+_TRANSLATION_CACHE_SIZE = 1024
+_PRECOMPRESSED_SUFFIXES = frozenset({
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.woff', '.woff2', '.mp3', '.mp4', '.m4a',
+})
+_PARALLEL_EXTRACT_MIN_FILES = 4
+# 병렬 추출 시 프로세스당 미리 제출해 두는 챕터 수. 호출자가 순회를 멈추면 그 이후 챕터는 파싱하지 않음
+_EXTRACT_PREFETCH_PER_WORKER = 2
+_XHTML_BODY_XPATH = etree.XPath(
+    '(/x:html/x:body | /html/body)[1]',
+    namespaces={'x': 'http://www.w3.org/1999/xhtml'},
+)
 
 
 @dataclass
@@ -52,16 +75,29 @@ def simplify_dom(body: Tag) -> None:
     
     :param body: XHTML의 <body> Tag
     """
-    for ruby in body.find_all('ruby'):
-        rt = ruby.find('rt')
-        if rt:
-            rt.decompose()
-        for rp in ruby.find_all('rp'):
-            rp.decompose()
-        ruby.unwrap()
-
-    for cls in _JP_INLINE_UNWRAP_CLASSES:
-        for span in body.find_all('span', class_=cls):
+    # 서브트리를 한 번만 순회하며 대상 태그를 분류한 뒤, 수집된 목록으로 일괄 처리
+    rubies: list[Tag] = []
+    ruby_annotations: list[Tag] = []
+    inline_spans: list[Tag] = []
+    for tag in body.find_all(['ruby', 'rt', 'rp', 'span']):
+        if tag.name == 'ruby':
+            rubies.append(tag)
+        elif tag.name == 'span':
+            cls_list = tag.get('class', [])
+            cls_set = set(cls_list) if isinstance(cls_list, list) else {cls_list} if cls_list else set()
+            if cls_set & _JP_INLINE_UNWRAP_CLASSES:
+                inline_spans.append(tag)
+        elif tag.find_parent('ruby') is not None:
+            ruby_annotations.append(tag)
+
+    for annotation in ruby_annotations:
+        if not annotation.decomposed:
+            annotation.decompose()
+    for ruby in rubies:
+        if not ruby.decomposed:
+            ruby.unwrap()
+    for span in inline_spans:
+        if not span.decomposed:
             span.unwrap()
 
     body.smooth()
@@ -114,14 +150,6 @@ def _collect_segments_from_node(node: Tag, segments: list[TextSegment], next_ind
     return next_index
 
 
-def _has_nested_block(elem: Tag) -> bool:
-    """elem 자손 중 블록 태그가 있는지 확인."""
-    for child in elem.descendants:
-        if isinstance(child, Tag) and child.name in _BLOCK_TAGS:
-            return True
-    return False
-
-
 def extract_segments(body: Tag) -> list[TextSegment]:
     """
     body에서 번역 가능한 텍스트 세그먼트를 추출합니다.
@@ -135,12 +163,19 @@ def extract_segments(body: Tag) -> list[TextSegment]:
     segments: list[TextSegment] = []
     index = 0
 
-    for elem in list(body.descendants):
-        if not isinstance(elem, Tag):
-            continue
-        if elem.name not in _BLOCK_TAGS:
-            continue
-        if _has_nested_block(elem):
+    block_elems: list[Tag] = body.find_all(list(_BLOCK_TAGS))
+
+    # 블록 태그의 조상을 한 번씩만 표시해 두고, 표시되지 않은 블록(가장 안쪽 블록)만 수집
+    # 이미 표시된 조상을 만나면 그 위도 표시되어 있으므로 순회를 멈춤
+    has_nested_block: set[int] = set()
+    for elem in block_elems:
+        parent = elem.parent
+        while parent is not None and parent is not body and id(parent) not in has_nested_block:
+            has_nested_block.add(id(parent))
+            parent = parent.parent
+
+    for elem in block_elems:
+        if id(elem) in has_nested_block:
             continue
 
         index = _collect_segments_from_node(elem, segments, index)
@@ -193,6 +228,25 @@ def build_chunk_text(chunk: list[TextSegment]) -> str:
     return "\n".join(f"[{seg.index}] {seg.original_text}" for seg in chunk)
 
 
+def validate_translated_chunk(translated_text: str, chunk_text: str) -> None:
+    """
+    번역 결과에 chunk의 모든 [index] 마커가 있는지 확인합니다.
+    마커가 빠진 응답은 parse_translated_chunk에서 원문 그대로 남거나 어긋나게 매핑될 수 있으므로
+    캐시에 저장하거나 재사용하기 전에 이 함수로 걸러냅니다.
+
+    :param translated_text: 번역기가 반환한 텍스트
+    :param chunk_text: build_chunk_text()로 만든 번역기 입력 텍스트
+    :raises InvalidTranslationError: 누락된 마커가 있는 경우
+    """
+    expected = {m.group(1) for m in _MARKER_LINE_RE.finditer(chunk_text)}
+    missing = expected.difference(m.group(1) for m in _MARKER_LINE_RE.finditer(translated_text.strip()))
+    if missing:
+        raise InvalidTranslationError(
+            f"번역 결과에 마커 {len(missing)}개가 없습니다: {sorted(missing, key=int)[:5]}",
+            translated_text,
+        )
+
+
 def parse_translated_chunk(translated_text: str, chunk: list[TextSegment]) -> dict[int, str]:
     """
     번역기 출력에서 [index] 마커를 파싱하여 {index: 번역문} 매핑을 반환합니다.
@@ -207,34 +261,19 @@ def parse_translated_chunk(translated_text: str, chunk: list[TextSegment]) -> di
     :returns: {segment_index: 번역문} 매핑
     """
     result: dict[int, str] = {}
-    marker_pattern = re.compile(r'^\[(\d+)\]\s*(.*)$')
-    lines = translated_text.strip().split('\n')
-
-    current_index: int | None = None
-    current_lines: list[str] = []
-
-    for line in lines:
-        m = marker_pattern.match(line)
-        if m:
-            if current_index is not None:
-                result[current_index] = "\n".join(current_lines).strip()
-            current_index = int(m.group(1))
-            current_lines = [m.group(2)]
-        else:
-            if current_index is not None:
-                current_lines.append(line)
+    text = translated_text.strip()
+    matches = list(_MARKER_LINE_RE.finditer(text))
 
-    if current_index is not None:
-        result[current_index] = "\n".join(current_lines).strip()
+    # 각 마커의 본문 = 마커 줄의 나머지 + 다음 마커 직전까지의 줄들
+    for m, next_m in zip(matches, matches[1:] + [None]):
+        end = next_m.start() if next_m is not None else len(text)
+        result[int(m.group(1))] = (m.group(2) + text[m.end():end]).strip()
 
     expected_indices = {seg.index for seg in chunk}
     if result.keys() >= expected_indices:
         return {k: v for k, v in result.items() if k in expected_indices}
 
-    cleaned_lines = []
-    for line in lines:
-        m = marker_pattern.match(line)
-        cleaned_lines.append(m.group(2) if m else line)
+    cleaned_lines = _MARKER_LINE_RE.sub(r'\2', text).split('\n')
 
     non_empty = [l for l in cleaned_lines if l.strip()]
     if len(non_empty) == len(chunk):
@@ -327,7 +366,7 @@ def postprocess_xhtml(soup: BeautifulSoup, target_lang: str = "ko") -> None:
         elif isinstance(classes, str) and classes == 'vrtl':
             html_tag['class'] = 'hltr'
 
-    for script in soup.find_all('script', src=re.compile(r'kobo\.js')):
+    for script in soup.find_all('script', src=lambda src: src is not None and 'kobo.js' in src):
         script.decompose()
     for style in soup.find_all('style', id='koboSpanStyle'):
         style.decompose()
@@ -359,6 +398,12 @@ def translate_xhtml(
         logging.warning(f"XHTML 파일에 body 태그가 없습니다: {xhtml_path}")
         return str(soup)
 
+    # 블록 태그가 없는 파일(표지, 이미지 전용 페이지 등)은 DOM 단순화/세그먼트 추출을 건너뜀
+    if body.find(list(_BLOCK_TAGS)) is None:
+        logging.info(f"번역 대상 텍스트가 없습니다: {xhtml_path}")
+        postprocess_xhtml(soup, target_lang)
+        return str(soup)
+
     simplify_dom(body)
     segments = extract_segments(body)
 
@@ -380,6 +425,7 @@ def translate_epub(
     max_chars: int = 8000,
     max_workers: int = 10,
     progress_callback: Callable[[int, int, str], None] | None = None,
+    max_inflight: int | None = None,
 ) -> Path:
     """
     EPUB 파일 전체를 번역합니다.
@@ -393,11 +439,13 @@ def translate_epub(
     :param target_lang: 대상 언어 코드
     :param max_chars: 번역기 1회 호출 당 최대 글자 수
     :param max_workers: 병렬 처리 워커 수 (기본 10)
+    :param progress_callback: 파일 하나가 끝날 때마다 (완료 수, 전체 수, 파일명)으로 호출
+    :param max_inflight: 동시에 제출해 둘 최대 작업 수 (기본 max_workers * 2)
     :returns: 번역된 EPUB이 추출된 디렉토리 경로
     """
     output_dir: Path = epub.output_dir
     opf_dir: Path = epub.opf_dir
-    xhtml_files: list[element.Tag] = epub.xhtml_files
+    xhtml_files: list[etree._Element] = epub.xhtml_files
 
     # 유효한 XHTML 경로 목록 수집
     xhtml_paths: list[Path] = []
@@ -411,10 +459,26 @@ def translate_epub(
             continue
         xhtml_paths.append(resolved)
 
+    # 같은 (chunk, 이전 문맥) 조합은 파일이 달라도 다시 번역하지 않음
+    # 예외는 캐시되지 않으므로 마커 검증에 실패한 응답도 저장되지 않음
+    @functools.lru_cache(maxsize=_TRANSLATION_CACHE_SIZE)
+    def _translate_validated(chunk_text: str, prev_context: str) -> str:
+        translated = translate_fn(chunk_text, prev_context)
+        validate_translated_chunk(translated, chunk_text)
+        return translated
+
+    def _translate(chunk_text: str, prev_context: str) -> str:
+        try:
+            return _translate_validated(chunk_text, prev_context)
+        except InvalidTranslationError as e:
+            # 이번 실행에서는 기존처럼 parse_translated_chunk의 대체 매핑을 사용하고, 다음 실행에서 다시 요청
+            logging.warning(f"번역 결과 검증 실패 (저장하지 않음): {e}")
+            return e.response
+
     def _process_one(xhtml_path: Path) -> None:
         """단일 XHTML 파일 번역 후 덮어쓰기."""
         translated_xhtml = translate_xhtml(
-            xhtml_path, translate_fn, target_lang, max_chars
+            xhtml_path, _translate, target_lang, max_chars
         )
         with open(xhtml_path, 'w', encoding='utf-8') as f:
             f.write(translated_xhtml)
@@ -428,15 +492,27 @@ def translate_epub(
             if progress_callback is not None:
                 progress_callback(index, total_files, xhtml_path.name)
     else:
-        # 병렬 처리
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {
-                executor.submit(_process_one, p): p for p in xhtml_paths
-            }
-            with tqdm(total=len(futures), desc="번역 중", unit="file") as pbar:
-                done_count = 0
-                for future in concurrent.futures.as_completed(futures):
-                    path = futures[future]
+        # 병렬 처리: 동시에 진행 중인 작업을 max_inflight개로 제한하여 future 누적과 API 폭주를 막음
+        if max_inflight is None:
+            max_inflight = max_workers * 2
+        pending: dict[concurrent.futures.Future, Path] = {}
+        # 큰 파일부터 제출(LPT)하여 마지막에 긴 챕터 하나만 남는 상황을 줄임
+        path_iter = iter(sorted(xhtml_paths, key=lambda p: p.stat().st_size, reverse=True))
+        done_count = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor, \
+                tqdm(total=total_files, desc="번역 중", unit="file") as pbar:
+            while True:
+                for p in path_iter:
+                    pending[executor.submit(_process_one, p)] = p
+                    if len(pending) >= max_inflight:
+                        break
+                if not pending:
+                    break
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    path = pending.pop(future)
                     try:
                         future.result()
                     except Exception as e:
@@ -466,91 +542,91 @@ def extract_epub(epub_path: Path, workspace: Path) -> dict:
     elif epub_path.suffix.lower() != '.epub':
         raise ValueError(f"유효한 EPUB 파일이 아닙니다: {epub_path}")
     
-    counter = 1
-    output_dir = workspace / "extracted_epubs" / epub_path.stem
+    extracted_root = workspace / "extracted_epubs"
+    output_dir = extracted_root / epub_path.stem
     if output_dir.exists():
-        while True:
-            new_output_dir = workspace / "extracted_epubs" / f"{epub_path.stem}({counter})"
-            if not new_output_dir.exists():
-                output_dir = new_output_dir
-                break
+        # 후보마다 exists()를 호출하지 않고 디렉토리 목록을 한 번만 읽어 다음 번호를 찾음
+        existing_names = {entry.name for entry in os.scandir(extracted_root)}
+        counter = 1
+        while f"{epub_path.stem}({counter})" in existing_names:
             counter += 1
-    else:
-        output_dir = output_dir
+        output_dir = extracted_root / f"{epub_path.stem}({counter})"
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    log_path: Path = output_dir / "log.txt"
-
     with zipfile.ZipFile(epub_path, 'r') as f:
-        root = zipfile.Path(f)
-
-        def get_file_by_suffix(suffix: str) -> list[zipfile.Path]:
-            return [p for p in root.rglob(f"*.{suffix}") if p.is_file()]
-        
-        def get_xhtml_files_from_opf(opf_path: zipfile.Path) -> list[element.Tag]:
+        def get_xhtml_files_from_opf(opf_info: zipfile.ZipInfo) -> list[etree._Element]:
             """
             OPF 파일에서 xhtml 파일 목록을 추출하고 spine 순서로 정렬합니다.
             spine에 없는 항목은 manifest 순서로 뒤에 추가됩니다.
             
-            :param opf_path: OPF 파일의 zipfile.Path
-            :returns: 정렬된 xhtml item Tag 리스트
+            :param opf_info: OPF 파일의 zipfile.ZipInfo
+            :returns: 정렬된 xhtml item Element 리스트
             """
-            with opf_path.open('r', encoding='utf-8') as opf_file:
-                opf_soup = BeautifulSoup(opf_file, 'xml')
-            
-            manifest: element.Tag | None = opf_soup.find('manifest')
-            if not manifest:
+            has_manifest = False
+            has_spine = False
+            xhtml_files: list[etree._Element] = []
+            idref_order: list[str | None] = []
+
+            # 전체 DOM을 탐색하지 않고 manifest/spine 관련 태그의 end 이벤트만 스트리밍으로 처리
+            with f.open(opf_info) as opf_file:
+                for _, elem in etree.iterparse(opf_file, events=('end',), tag=_OPF_ITERPARSE_TAGS):
+                    local_name = etree.QName(elem).localname
+                    if local_name == 'item':
+                        if _MEDIA_TYPE_RE.search(elem.get('media-type', '')):
+                            xhtml_files.append(elem)
+                        else:
+                            elem.clear()
+                    elif local_name == 'itemref':
+                        idref_order.append(elem.get('idref'))
+                        elem.clear()
+                    elif local_name == 'manifest':
+                        has_manifest = True
+                    else:
+                        has_spine = True
+
+            if not has_manifest:
                 raise NotValidOPFError("OPF 파일에 manifest 태그가 없습니다.")
-            spine: element.Tag | None = opf_soup.find('spine')
-            if not spine:
+            if not has_spine:
                 raise NotValidOPFError("OPF 파일에 spine 태그가 없습니다.")
-
-            media_type_pattern = re.compile(r'application/(xhtml\+xml|x-dtbook\+xml)', re.IGNORECASE)
-            xhtml_files: element.ResultSet[element.Tag] = manifest.find_all('item', attrs={'media-type': media_type_pattern})
             if not xhtml_files:
                 raise NotValidOPFError("OPF 파일의 manifest에 xhtml 파일이 없습니다.")
 
-            idref_order = [item['idref'] for item in spine.find_all('itemref')]
             id_to_item = {item.get('id'): item for item in xhtml_files}
 
-            ordered_items: list[element.Tag] = []
-            added_ids = set()
-            for item_id in idref_order:
-                item = id_to_item.get(item_id)
-                if item is not None:
-                    ordered_items.append(item)
-                    added_ids.add(item_id)
+            # dict의 삽입 순서를 순서 있는 집합으로 사용: spine 순서 → 나머지 manifest 순서
+            ordered_items = dict.fromkeys(
+                id_to_item[item_id] for item_id in idref_order if item_id in id_to_item
+            )
+            ordered_items.update(dict.fromkeys(xhtml_files))
 
-            for item in xhtml_files:
-                item_id = item.get('id')
-                if item_id not in added_ids:
-                    ordered_items.append(item)
+            return list(ordered_items)
 
-            return ordered_items
+        infos = f.infolist()
+        opf_info = next((info for info in infos if info.filename.endswith('.opf')), None)
+        if opf_info is None: raise FileNotFoundError("OPF 파일을 찾을 수 없습니다.")
+        logging.info(f"Found OPF file: {opf_info.filename}")
 
-        opf_path = get_file_by_suffix("opf")[0]
-        if not opf_path: raise FileNotFoundError("OPF 파일을 찾을 수 없습니다.")
-        logging.info(f"Found OPF file: {opf_path}")
-
-        with opf_path.open('r', encoding='utf-8') as opf_file:
-            opf_soup = BeautifulSoup(opf_file, 'xml')
-        
-        xhtml_files = get_xhtml_files_from_opf(opf_path)
+        xhtml_files = get_xhtml_files_from_opf(opf_info)
         if not xhtml_files: 
             raise FileNotFoundError("OPF 파일에서 xhtml 파일 목록을 추출할 수 없습니다.")
 
         logging.info(f"Found {len(xhtml_files)} XHTML files in OPF.")
 
-        opf_parent = Path(opf_path.at).parent
+        opf_parent = Path(opf_info.filename).parent
+
+        # 같은 디렉토리에 대한 mkdir 시스템 콜을 반복하지 않도록 생성한 디렉토리를 기록
+        created_dirs: set[Path] = set()
+        for info in infos:
+            member_path = output_dir / info.filename
+            member_dir = member_path if info.is_dir() else member_path.parent
+            if member_dir not in created_dirs:
+                member_dir.mkdir(parents=True, exist_ok=True)
+                created_dirs.add(member_dir)
+            if info.is_dir():
+                continue
 
-        for member in f.namelist():
-            member_path = output_dir / member
-            if member.endswith('/'):
-                member_path.mkdir(parents=True, exist_ok=True)
-            else:
-                member_path.parent.mkdir(parents=True, exist_ok=True)
-                with f.open(member) as source, open(member_path, 'wb') as target:
-                    target.write(source.read())
+            with f.open(info) as source, open(member_path, 'wb') as target:
+                shutil.copyfileobj(source, target, 1 << 20)
 
     data: dict = {
         "output_dir": output_dir,
@@ -565,6 +641,7 @@ def repackage_epub(extracted_dir: Path, output_path: Path) -> Path:
     추출된 EPUB 디렉토리를 .epub 파일로 다시 패키징합니다.
 
     EPUB 스펙에 따라 mimetype 파일은 압축하지 않고 ZIP의 첫 번째 엔트리로 저장합니다.
+    이미 압축된 이미지/폰트/미디어 파일은 재압축하지 않고 저장합니다.
     작업용 log.txt는 제외합니다.
 
     :param extracted_dir: 추출된 EPUB 파일들이 있는 디렉토리
@@ -586,7 +663,11 @@ def repackage_epub(extracted_dir: Path, output_path: Path) -> Path:
             arcname = file_path.relative_to(extracted_dir).as_posix()
             if arcname == "log.txt":
                 continue
-            zf.write(file_path, arcname)
+            if file_path.suffix.lower() in _PRECOMPRESSED_SUFFIXES:
+                # 이미 압축된 이미지/폰트는 DEFLATE 이득이 거의 없으므로 CPU를 쓰지 않고 그대로 저장
+                zf.write(file_path, arcname, compress_type=zipfile.ZIP_STORED)
+            else:
+                zf.write(file_path, arcname)
 
     logging.info(f"EPUB 패키징 완료: {output_path}")
     return output_path
@@ -600,28 +681,90 @@ def trim_ruby_text(text: str) -> str:
     :param text: Ruby 태그가 포함될 수 있는 텍스트
     :returns: Ruby 주석이 치환된 텍스트
     """
-    ruby_pattern = re.compile(r'<ruby>(.*?)<rt>(.*?)</rt></ruby>')
-    def replace_ruby(match: re.Match) -> str:
-        kanji = match.group(1)
-        furigana = match.group(2)
-        return f"{kanji} (Ruby: {furigana})"
+    # Ruby 태그가 없는 대부분의 텍스트는 정규식 엔진을 거치지 않고 그대로 반환
+    if '<ruby>' not in text:
+        return text
+    return _RUBY_RE.sub(r'\1 (Ruby: \2)', text)
+
+def _flatten_ruby(body: etree._Element) -> None:
+    """
+    lxml 트리의 ``<ruby>`` 요소를 ``漢字 (Ruby: かんじ)`` 형태의 텍스트로 치환합니다.
+    
+    치환된 텍스트는 앞뒤 텍스트 노드와 이어 붙여 문장이 끊기지 않도록 합니다.
     
-    return ruby_pattern.sub(replace_ruby, text)
+    :param body: XHTML의 <body> Element
+    """
+    for ruby in list(body.iter('{*}ruby')):
+        parent = ruby.getparent()
+        if parent is None:
+            continue
 
-def text_from_epub(epub: Epub) -> str:
+        base: list[str] = [ruby.text or '']
+        readings: list[str] = []
+        for child in ruby:
+            local_name = etree.QName(child).localname
+            if local_name == 'rt':
+                readings.append(''.join(child.itertext()))
+            elif local_name != 'rp':
+                base.append(''.join(child.itertext()))
+            base.append(child.tail or '')
+
+        kanji = ''.join(base)
+        reading = ''.join(readings)
+        replaced = f"{kanji} (Ruby: {reading})" if reading else kanji
+        replaced += ruby.tail or ''
+
+        previous = ruby.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or '') + replaced
+        else:
+            parent.text = (parent.text or '') + replaced
+        parent.remove(ruby)
+
+def _extract_chapter_text(xhtml_path: Path) -> str | None:
     """
-    EPUB에서 추출한 xhtml 파일 목록에서 전체 텍스트를 추출합니다.
-    태그를 무시하고 body의 텍스트만 합쳐서 반환합니다.
+    단일 XHTML 파일의 body 텍스트를 추출합니다.
+    ProcessPoolExecutor 워커에서 실행되므로 모듈 최상위 함수로 둡니다.
+    
+    :param xhtml_path: XHTML 파일 경로
+    :returns: 추출된 텍스트, body 태그가 없으면 None
+    """
+    # 한 번만 읽은 바이트를 lxml 파싱과 BeautifulSoup 폴백에서 함께 사용
+    xhtml_bytes = xhtml_path.read_bytes()
+    try:
+        bodies = _XHTML_BODY_XPATH(etree.fromstring(xhtml_bytes))
+        body = bodies[0] if bodies else None
+        if body is None:
+            logging.warning(f"XHTML 파일에 body 태그가 없습니다: {xhtml_path}. 건너뜁니다.")
+            return None
+        _flatten_ruby(body)
+        return "\n".join(t.strip() for t in body.itertext() if t.strip())
+    except etree.XMLSyntaxError:
+        # 잘못된 XML인 경우에만 BeautifulSoup으로 관대하게 파싱
+        raw_xhtml = trim_ruby_text(xhtml_bytes.decode('utf-8'))
+        xhtml_soup = BeautifulSoup(raw_xhtml, 'xml', multi_valued_attributes=_XHTML_MULTI_VALUED_ATTRS)
+        soup_body = xhtml_soup.find('body')
+        if not soup_body:
+            logging.warning(f"XHTML 파일에 body 태그가 없습니다: {xhtml_path}. 건너뜁니다.")
+            return None
+        return soup_body.get_text(separator='\n', strip=True)
+
+def iter_chapter_texts(epub: Epub) -> Iterator[str]:
+    """
+    EPUB의 xhtml 파일을 spine 순서대로 하나씩 텍스트로 추출하여 생성합니다.
+    태그를 무시하고 body의 텍스트만 반환하며, 추출에 실패한 파일은 건너뜁니다.
+    Ruby 주석은 ``漢字 (Ruby: かんじ)`` 형태로 치환됩니다.
+    파일 수가 _PARALLEL_EXTRACT_MIN_FILES 이상이면 프로세스 풀에서 병렬로 파싱하되,
+    한 번에 제한된 수만 제출하므로 순회를 중간에 멈추면 나머지 챕터는 파싱하지 않습니다.
     
     :param epub: Epub 객체
-    :returns: 추출된 전체 텍스트
+    :returns: 챕터별 텍스트 이터레이터
     """
     output_dir = epub.output_dir
     ordered_xhtml_files = epub.xhtml_files
     opf_dir = epub.opf_dir
 
-    full_text = ""
-
+    xhtml_paths: list[Path] = []
     for item in ordered_xhtml_files:
         href: str = str(item.get('href'))
         if not href:
@@ -632,20 +775,44 @@ def text_from_epub(epub: Epub) -> str:
         if not xhtml_path.exists():
             logging.warning(f"XHTML 파일을 찾을 수 없습니다: {xhtml_path}. 건너뜁니다.")
             continue
-        
-        with xhtml_path.open('r', encoding='utf-8') as f:
-            xhtml_soup = BeautifulSoup(f, 'xml', multi_valued_attributes=_XHTML_MULTI_VALUED_ATTRS)
-        
-        body = xhtml_soup.find('body')
-        if not body:
-            logging.warning(f"XHTML 파일에 body 태그가 없습니다: {xhtml_path}. 건너뜁니다.")
-            continue
-        
-        text = body.get_text(separator='\n', strip=True)
-        text = trim_ruby_text(text)
-        full_text += text + "\n\n"
+
+        xhtml_paths.append(xhtml_path)
+
+    if len(xhtml_paths) < _PARALLEL_EXTRACT_MIN_FILES:
+        texts = map(_extract_chapter_text, xhtml_paths)
+        yield from (text for text in texts if text is not None)
+        return
+
+    max_workers = os.cpu_count() or 1
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        # spine 순서를 유지하도록 먼저 제출한 작업부터 결과를 꺼내고, 하나 꺼낼 때마다 다음 챕터를 제출
+        window = max_workers * _EXTRACT_PREFETCH_PER_WORKER
+        pending_paths = iter(xhtml_paths)
+        pending: collections.deque[concurrent.futures.Future] = collections.deque(
+            executor.submit(_extract_chapter_text, path)
+            for path in itertools.islice(pending_paths, window)
+        )
+        while pending:
+            text = pending.popleft().result()
+            next_path = next(pending_paths, None)
+            if next_path is not None:
+                pending.append(executor.submit(_extract_chapter_text, next_path))
+            if text is not None:
+                yield text
+    finally:
+        # 호출자가 중간에 순회를 멈추면 남은 작업은 취소
+        executor.shutdown(cancel_futures=True)
+
+def text_from_epub(epub: Epub) -> str:
+    """
+    EPUB에서 추출한 xhtml 파일 목록에서 전체 텍스트를 추출합니다.
+    챕터별 텍스트(iter_chapter_texts)를 빈 줄로 이어 붙여 반환합니다.
     
-    return full_text.strip()
+    :param epub: Epub 객체
+    :returns: 추출된 전체 텍스트
+    """
+    return "\n\n".join(iter_chapter_texts(epub)).strip()
 
 class Epub():
     def __init__(self, epub_path: Path, workspace: Path):
@@ -654,4 +821,4 @@ class Epub():
         _data = extract_epub(epub_path, workspace)
         self.output_dir: Path = _data["output_dir"]
         self.opf_dir: Path = _data["opf_dir"]
-        self.xhtml_files: list[element.Tag] = _data["xhtml_files"]
+        self.xhtml_files: list[etree._Element] = _data["xhtml_files"]
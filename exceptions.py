@@ -3,3 +3,9 @@ class EPUBError(ValueError):
 
 class NotValidOPFError(EPUBError):
     pass
+
+class InvalidTranslationError(ValueError):
+    """번역 응답에 기대한 [index] 마커가 빠진 경우. 검증에 실패한 응답 원문은 response에 담김"""
+    def __init__(self, message: str, response: str):
+        super().__init__(message)
+        self.response = response
@@ -1,5 +1,6 @@
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 import keyring
 
@@ -56,6 +57,13 @@ def get_keyring(name: str) -> str:
 def load_keyring(name: str) -> None:
     os.environ[name] = get_keyring(name)
 
+def load_keyring_many(names: list[str]) -> None:
+    """여러 키를 동시에 조회하여 환경 변수로 로드 (키마다 발생하는 백엔드 IPC/pass 호출 지연을 겹침)"""
+    with ThreadPoolExecutor(max_workers=max(1, len(names))) as executor:
+        keys = list(executor.map(get_keyring, names))
+    for name, key in zip(names, keys):
+        os.environ[name] = key
+
 def list_keyring() -> dict[str, str]:
     key_list = {}
     
@@ -8,7 +8,6 @@ from typing import Annotated
 import typer
 
 from utils.utils import get_workspace
-from utils.cli import RunWorker
 
 
 app = typer.Typer(
@@ -33,6 +32,13 @@ def run(
         key: Annotated[str|None, typer.Option("--key", "-k", help="API 키")] = None,
         yes: Annotated[bool, typer.Option("-y")] = False
     ) -> None:
+    # 무거운 번역 모듈을 import하기 전에 입력 파일부터 확인
+    if not Path(epub_file).is_file():
+        typer.secho(f"EPUB 파일을 찾을 수 없습니다: {epub_file}", fg=typer.colors.RED)
+        raise typer.Exit(1)
+
+    from utils.cli import RunWorker
+
     worker = RunWorker(
         epub_file_value=epub_file,
         provider_value=provider,
@@ -47,20 +53,22 @@ def dashboard_start(
     port: Annotated[int, typer.Option("--port", "-p", help="대시보드 포트")] = 8000
 ):
     """FastAPI 대시보드를 백그라운드에서 실행합니다."""
-    from keyauth import load_keyring
+    from keyauth import load_keyring_many
     
     typer.echo(f"포트 {port}에서 백그라운드 서버 시작을 준비합니다...")
     typer.echo("API 키를 환경 변수로 로드합니다...")
     try:
-        load_keyring("GEMINI_KEY")
-        load_keyring("OPENROUTER_KEY")
+        load_keyring_many(["GEMINI_KEY", "OPENROUTER_KEY"])
         typer.secho("API 키가 성공적으로 로드되었습니다.", fg=typer.colors.GREEN)
     except Exception as e:
         typer.secho(f"API 키 로드 중 오류 발생: {e}", fg=typer.colors.RED)
         raise typer.Exit(1)
 
 
-    if PID_FILE.exists():
+    # 존재 확인과 생성을 한 번에 수행하여 동시에 실행된 start가 서버를 중복으로 띄우지 않도록 함
+    try:
+        pid_fd = os.open(PID_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
         typer.secho("대시보드가 이미 실행 중인 것 같습니다. (먼저 stop 커맨드를 사용하세요)", fg=typer.colors.YELLOW)
         raise typer.Exit(1)
 
@@ -74,14 +82,19 @@ def dashboard_start(
                 cmd,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL,
-                start_new_session=True
+                start_new_session=True,
+                # 자식에게 상속될 fd가 없으므로(pid_fd 등 os.open fd는 기본 비상속) fd 전체를 닫는 과정을 생략
+                close_fds=False,
             )
-            PID_FILE.write_text(str(process.pid))
+            os.write(pid_fd, str(process.pid).encode())
         typer.secho(f"대시보드가 백그라운드에서 실행되었습니다! (PID: {process.pid})", fg=typer.colors.GREEN)
         typer.echo(f"접속 주소: http://127.0.0.1:{port}")
         
     except Exception as e:
+        PID_FILE.unlink(missing_ok=True)
         typer.secho(f"서버 실행 실패: {e}", fg=typer.colors.RED)
+    finally:
+        os.close(pid_fd)
 
 @dashboard.command("stop")
 def dashboard_stop():
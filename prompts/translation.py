@@ -65,6 +65,16 @@ base_prompt_text = """
 </source>
 """
 
+# 청크마다 base_prompt_text.format()으로 템플릿을 다시 해석하지 않도록 placeholder 위치에서 미리 분할
+_PROMPT_BEFORE_PREV_CONTEXT, _prompt_rest = base_prompt_text.split("{prev_context}", 1)
+_PROMPT_BEFORE_CURRENT_TEXT, _PROMPT_AFTER_CURRENT_TEXT = _prompt_rest.split("{current_text}", 1)
+del _prompt_rest
+
+
+def build_translation_prompt(prev_context: str, current_text: str) -> str:
+    """base_prompt_text.format(prev_context=..., current_text=...)과 동일한 결과를 반환합니다."""
+    return f"{_PROMPT_BEFORE_PREV_CONTEXT}{prev_context}{_PROMPT_BEFORE_CURRENT_TEXT}{current_text}{_PROMPT_AFTER_CURRENT_TEXT}"
+
 
 # 2차 번역(재검토/퇴고) 프롬프트
 SECOND_TRANSLATION_PROMPT_INSTRUCTIONS = """
@@ -1,11 +1,239 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from pathlib import Path
+from typing import Any, Callable
+import atexit
+import functools
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
 import time
 
 import httpx
+import orjson
 from pydantic import BaseModel, ConfigDict
 from google import genai
 
+import settings
+from utils.utils import get_workspace
+
+
+# 일시적 오류(408/429/5xx, 연결 오류)는 SDK가 지수 백오프 + 지터로 재시도 (기본값은 재시도하지 않음)
+_GOOGLE_RETRY_OPTIONS = genai.types.HttpRetryOptions(attempts=5, initial_delay=1.0, max_delay=60.0)
+# OpenRouter에서 재시도할 HTTP 상태 코드. 그 밖의 4xx(잘못된 키, 요청 형식 오류 등)는 재시도해도 같은 결과이므로 즉시 실패
+_RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+# 서버가 지나치게 긴 Retry-After를 보내더라도 워커가 멈춰 있지 않도록 상한을 둠
+_MAX_RETRY_AFTER_SECONDS = 60.0
+
+# close_shared_clients에서 닫을 수 있도록 생성된 genai.Client를 기록 (lru_cache는 저장된 값을 열람할 수 없음)
+_genai_clients: list[genai.Client] = []
+
+
+@functools.lru_cache(maxsize=None)
+def _get_genai_client(api_key: str) -> genai.Client:
+    """API 키별 genai.Client를 프로세스 내에서 공유 (모델 목록 조회와 생성 요청이 같은 커넥션 풀을 사용)"""
+    client = genai.Client(
+        api_key=api_key,
+        http_options=genai.types.HttpOptions(retry_options=_GOOGLE_RETRY_OPTIONS),
+    )
+    _genai_clients.append(client)
+    return client
+
+
+@functools.lru_cache(maxsize=1)
+def _get_http_client() -> httpx.Client:
+    """OpenRouter 요청이 공유하는 httpx.Client. 헤더/타임아웃은 요청마다 지정"""
+    # 사전 생성과 번역 사이처럼 요청 간격이 길어도 커넥션이 유지되도록 keep-alive 만료를 늘림
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=300),
+    )
+
+
+class ResponseCache:
+    """
+    generate_content 응답을 SQLite에 저장하는 정확 일치(exact-match) 캐시.
+
+    키는 출력에 영향을 주는 설정(provider, 모델, 샘플링 파라미터, 시스템 프롬프트, 응답 형식)과
+    user_prompt를 정렬된 JSON으로 직렬화한 SHA-256이며, API 키와 타임아웃은 포함하지 않습니다.
+    여러 번역 워커 스레드에서 동시에 사용할 수 있습니다.
+    """
+
+    def __init__(self, db_path: Path, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key BLOB PRIMARY KEY, response TEXT NOT NULL, created_at INTEGER NOT NULL)"
+            )
+            self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(params: dict[str, Any], user_prompt: str) -> bytes:
+        payload = json.dumps({**params, "prompt": user_prompt}, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).digest()
+
+    def delete(self, key: bytes) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def get(self, key: bytes) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND created_at >= ?",
+                (key, int(time.time()) - self.ttl_seconds),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: bytes, response: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at) VALUES (?, ?, ?)",
+                (key, response, int(time.time())),
+            )
+            self._conn.commit()
+
+    def evict(self) -> None:
+        """TTL이 지난 항목과 max_entries를 넘는 오래된 항목을 삭제합니다."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?",
+                (int(time.time()) - self.ttl_seconds,),
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_response_cache() -> ResponseCache | None:
+    """settings.LLM_CACHE 설정에 따라 프로세스 공용 ResponseCache를 반환 (비활성/열기 실패 시 None)"""
+    config = getattr(settings, "LLM_CACHE", {})
+    if not config.get("enabled", False):
+        return None
+    try:
+        return ResponseCache(
+            get_workspace() / "llm_cache.sqlite",
+            ttl_seconds=config.get("ttl_seconds", 30 * 24 * 60 * 60),
+            max_entries=config.get("max_entries", 100000),
+        )
+    except sqlite3.Error as e:
+        logging.warning(f"LLM 응답 캐시를 열 수 없어 캐시 없이 진행합니다: {e}")
+        return None
+
+
+@atexit.register
+def close_shared_clients() -> None:
+    """
+    프로세스 공용 HTTP 클라이언트와 응답 캐시를 닫습니다.
+    이미 생성된 것만 닫으며, 여러 번 호출해도 안전합니다. (정상 종료 시 atexit로도 호출됨)
+    """
+    if _get_http_client.cache_info().currsize:
+        _get_http_client().close()
+        _get_http_client.cache_clear()
+    while _genai_clients:
+        _genai_clients.pop().close()
+    _get_genai_client.cache_clear()
+    if _get_response_cache.cache_info().currsize:
+        cache = _get_response_cache()
+        if cache is not None:
+            cache.close()
+        _get_response_cache.cache_clear()
+
+
+def _cached_generation(generate: Callable[[Any, str], str]) -> Callable[[Any, str], str]:
+    """
+    generate_content 앞에서 ResponseCache를 조회하고, 미스일 때만 실제 API를 호출해 결과를 저장.
+    검증 함수(호출 시 response_validator 인자 또는 인스턴스의 response_validator)가 있으면
+    검증을 통과한 응답만 저장하고, 검증에 실패하는 캐시 항목은 삭제한 뒤 다시 요청합니다.
+    """
+    @functools.wraps(generate)
+    def wrapper(self, user_prompt: str, response_validator: Callable[[str], Any] | None = None) -> str:
+        validator = response_validator if response_validator is not None else self.response_validator
+        cache = _get_response_cache()
+        if cache is None:
+            response = generate(self, user_prompt)
+            if validator is not None:
+                validator(response)
+            return response
+
+        key = cache.make_key(self._cache_params, user_prompt)
+        cached = cache.get(key)
+        if cached is not None:
+            if validator is None:
+                return cached
+            try:
+                validator(cached)
+                return cached
+            except Exception:
+                cache.delete(key)
+
+        response = generate(self, user_prompt)
+        if validator is not None:
+            # 잘리거나 형식이 깨진 응답이 TTL 동안 재사용되지 않도록 검증 실패 시 저장하지 않고 그대로 예외를 전달
+            validator(response)
+        cache.set(key, response)
+        return response
+
+    return wrapper
+
+
+_MODEL_LIST_CACHE_TTL = 60 * 60
+_model_list_cache_lock = threading.Lock()
+
+
+def _cached_model_list(cache_scope: str, api_key: str, fetch: Callable[[], list[str]]) -> list[str]:
+    """
+    모델 목록을 workspace의 model_list_cache.json에 _MODEL_LIST_CACHE_TTL 동안 캐시합니다.
+    API 키는 파일에 남지 않도록 blake2b 해시로만 키에 사용합니다.
+
+    :param cache_scope: provider(및 엔드포인트)를 구분하는 문자열
+    :param api_key: API 키
+    :param fetch: 캐시 미스 시 실제 목록을 조회하는 함수
+    :returns: 모델 이름 목록
+    """
+    cache_path = get_workspace() / "model_list_cache.json"
+    cache_key = f"{cache_scope}:{hashlib.blake2b(api_key.encode('utf-8'), digest_size=16).hexdigest()}"
+
+    with _model_list_cache_lock:
+        try:
+            entries = orjson.loads(cache_path.read_bytes())
+        except (OSError, ValueError):
+            entries = {}
+        if not isinstance(entries, dict):
+            entries = {}
+        entry = entries.get(cache_key)
+        if isinstance(entry, dict) and time.time() - entry.get("ts", 0) < _MODEL_LIST_CACHE_TTL:
+            return entry["models"]
+
+    models = fetch()
+
+    with _model_list_cache_lock:
+        entries[cache_key] = {"ts": time.time(), "models": models}
+        tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+        try:
+            tmp_path.write_bytes(orjson.dumps(entries))
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logging.warning(f"모델 목록 캐시를 저장하지 못했습니다: {e}")
+
+    return models
+
 
 class ModelConfig(BaseModel):
     """프로바이더 공통 설정"""
@@ -18,6 +246,8 @@ class ModelConfig(BaseModel):
 class ModelProvider(ABC):
     def __init__(self, config: ModelConfig):
         self.config = config
+        # 응답을 캐시에 저장하기 전에 호출하는 검증 함수. 유효하지 않은 응답이면 예외를 발생시켜야 함
+        self.response_validator: Callable[[str], Any] | None = None
 
     @abstractmethod
     def generate_content(self, user_prompt: str) -> str:
@@ -37,17 +267,25 @@ class GoogleGenai(ModelProvider):
 
     @staticmethod
     def list_available_models(api_key: str) -> list[str]:
-        client = genai.Client(api_key=api_key)
-        return [m.name for m in client.models.list()]
+        def fetch() -> list[str]:
+            client = _get_genai_client(api_key)
+            return [m.name for m in client.models.list()]
+
+        return _cached_model_list("Google", api_key, fetch)
 
     def __init__(self, config: GoogleGenaiConfig):
         super().__init__(config)
         self.config: GoogleGenaiConfig = config
+        self._client = _get_genai_client(config.api_key)
+        self._cache_params = {
+            "provider": "Google",
+            "model": config.model_name,
+            "generation_config": config.generation_config.model_dump(mode="json", exclude_none=True),
+        }
 
+    @_cached_generation
     def generate_content(self, user_prompt: str) -> str:
-        client = genai.Client(api_key=self.config.api_key)
-
-        response = client.models.generate_content(
+        response = self._client.models.generate_content(
             model=self.config.model_name,
             contents=genai.types.Part.from_text(text=user_prompt),
             config=self.config.generation_config,
@@ -71,7 +309,7 @@ class OpenRouterConfig(ModelConfig):
     connect_timeout: float = 15.0
     write_timeout: float = 60.0
     read_timeout: float = 120.0
-    retry_count: int = 2
+    retry_count: int = 4
     retry_backoff_seconds: float = 1.5
     app_name: str | None = "EPUB-AI-Translator"
     app_url: str | None = None
@@ -82,20 +320,55 @@ class OpenRouter(ModelProvider):
 
     @staticmethod
     def list_available_models(api_key: str, base_url: str = "https://openrouter.ai/api/v1") -> list[str]:
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-        }
-        with httpx.Client(timeout=30.0) as client:
-            response = client.get(f"{base_url}/models", headers=headers)
+        def fetch() -> list[str]:
+            headers = {
+                "Authorization": f"Bearer {api_key}",
+            }
+            response = _get_http_client().get(f"{base_url}/models", headers=headers, timeout=httpx.Timeout(15.0, connect=5.0))
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
+
+            models = data.get("data", []) if isinstance(data, dict) else []
+            return [m.get("id", "") for m in models if isinstance(m, dict) and m.get("id")]
 
-        models = data.get("data", []) if isinstance(data, dict) else []
-        return [m.get("id", "") for m in models if isinstance(m, dict) and m.get("id")]
+        return _cached_model_list(f"OpenRouter:{base_url}", api_key, fetch)
 
     def __init__(self, config: OpenRouterConfig):
         super().__init__(config)
         self.config: OpenRouterConfig = config
+        # 재시도/병렬 워커/모델 목록 조회가 모두 같은 커넥션 풀을 사용 (httpx.Client는 스레드 안전)
+        self._client = _get_http_client()
+        self._cache_params = {
+            "provider": "OpenRouter",
+            "base_url": config.base_url,
+            "model": config.model_name,
+            "system_prompt": config.system_prompt,
+            "temperature": config.temperature,
+            "top_p": config.top_p,
+            "max_tokens": config.max_tokens,
+            "response_format": config.response_format,
+        }
+        # 요청마다 변하지 않는 헤더/타임아웃/페이로드 공통부는 한 번만 만들어 재사용
+        self._headers = self._build_headers()
+        self._timeout = self._build_timeout()
+        # 시스템 프롬프트(캐릭터 사전 포함)는 모든 청크 요청에서 동일하므로 프롬프트 캐싱 지점으로 표시
+        # (명시적 캐싱을 지원하는 모델만 사용하며, 나머지 모델은 무시하거나 자동 캐싱을 적용함)
+        self._system_messages: list[dict[str, Any]] = (
+            [{
+                "role": "system",
+                "content": [{"type": "text", "text": config.system_prompt, "cache_control": {"type": "ephemeral"}}],
+            }]
+            if config.system_prompt else []
+        )
+        self._base_payload: dict[str, Any] = {
+            "model": config.model_name,
+            "temperature": config.temperature,
+            "top_p": config.top_p,
+        }
+        if config.max_tokens is not None:
+            self._base_payload["max_tokens"] = config.max_tokens
+        if config.response_format is not None:
+            self._base_payload["response_format"] = config.response_format
 
     def _build_headers(self) -> dict[str, str]:
         headers: dict[str, str] = {
@@ -116,36 +389,37 @@ class OpenRouter(ModelProvider):
             read=self.config.read_timeout,
         )
 
-    def generate_content(self, user_prompt: str) -> str:
-        messages: list[dict[str, str]] = []
-        if self.config.system_prompt:
-            messages.append({"role": "system", "content": self.config.system_prompt})
-        messages.append({"role": "user", "content": user_prompt})
+    def _retry_delay(self, attempt: int, response: httpx.Response | None = None) -> float:
+        """
+        재시도 대기 시간. retry_backoff_seconds를 기준으로 시도마다 2배씩 늘리고(최대 8배), 동시 재시도가 몰리지 않도록 지터를 더함.
+        응답에 초 단위 Retry-After 헤더가 있으면(429 등) 최소한 그 시간만큼 대기
+        """
+        delay = self.config.retry_backoff_seconds * min(2 ** (attempt - 1), 8) + random.uniform(0, 0.25)
+        retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+        if retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), _MAX_RETRY_AFTER_SECONDS))
+        return delay
 
+    @_cached_generation
+    def generate_content(self, user_prompt: str) -> str:
         payload: dict[str, Any] = {
-            "model": self.config.model_name,
-            "messages": messages,
-            "temperature": self.config.temperature,
-            "top_p": self.config.top_p,
+            **self._base_payload,
+            "messages": [*self._system_messages, {"role": "user", "content": user_prompt}],
         }
-        if self.config.max_tokens is not None:
-            payload["max_tokens"] = self.config.max_tokens
-        if self.config.response_format is not None:
-            payload["response_format"] = self.config.response_format
 
         last_error: Exception | None = None
         max_attempts = self.config.retry_count + 1
 
         for attempt in range(1, max_attempts + 1):
             try:
-                with httpx.Client(timeout=self._build_timeout()) as client:
-                    response = client.post(
-                        f"{self.config.base_url}/chat/completions",
-                        headers=self._build_headers(),
-                        json=payload,
-                    )
-                    response.raise_for_status()
-                    data = response.json()
+                response = self._client.post(
+                    f"{self.config.base_url}/chat/completions",
+                    headers=self._headers,
+                    content=orjson.dumps(payload),
+                    timeout=self._timeout,
+                )
+                response.raise_for_status()
+                data = orjson.loads(response.content)
                 break
             except httpx.TimeoutException as e:
                 last_error = e
@@ -154,15 +428,17 @@ class OpenRouter(ModelProvider):
                         "OpenRouter 응답 대기 시간이 초과되었습니다. "
                         f"read_timeout={self.config.read_timeout}s, 시도={max_attempts}"
                     ) from e
-                time.sleep(self.config.retry_backoff_seconds * attempt)
+                time.sleep(self._retry_delay(attempt))
             except httpx.HTTPError as e:
                 last_error = e
-                if attempt >= max_attempts:
+                status_response = e.response if isinstance(e, httpx.HTTPStatusError) else None
+                retryable = status_response is None or status_response.status_code in _RETRYABLE_STATUS_CODES
+                if attempt >= max_attempts or not retryable:
                     raise ConnectionError(
                         "OpenRouter 요청에 실패했습니다. "
                         f"{type(e).__name__}: {e}"
                     ) from e
-                time.sleep(self.config.retry_backoff_seconds * attempt)
+                time.sleep(self._retry_delay(attempt, status_response))
         else:
             raise RuntimeError(f"OpenRouter 요청 실패: {last_error}")
 
@@ -182,3 +458,72 @@ class OpenRouter(ModelProvider):
             raise ValueError("OpenRouter 모델로부터 유효한 텍스트 응답을 받지 못했습니다.")
 
         return content
+
+
+# 용도별 샘플링 설정 (캐릭터 사전: 정확성 우선, 번역: 자연스러운 표현 우선)
+_DICTIONARY_SAMPLING = {"temperature": 0.2, "top_p": 0.8}
+_TRANSLATION_SAMPLING = {"temperature": 0.7, "top_p": 0.9}
+
+
+def _build_google(api_key: str, model: str, system_prompt: str, is_dict_mode: bool) -> GoogleGenai:
+    generation_kwargs: dict[str, Any] = {
+        "system_instruction": system_prompt,
+        **(_DICTIONARY_SAMPLING if is_dict_mode else _TRANSLATION_SAMPLING),
+        "top_k": 40,
+    }
+    if is_dict_mode:
+        generation_kwargs["response_mime_type"] = "application/json"
+
+    return GoogleGenai(
+        config=GoogleGenaiConfig(
+            api_key=api_key,
+            model_name=model,
+            generation_config=genai.types.GenerateContentConfig(**generation_kwargs),
+        )
+    )
+
+
+def _build_openrouter(api_key: str, model: str, system_prompt: str, is_dict_mode: bool) -> OpenRouter:
+    return OpenRouter(
+        config=OpenRouterConfig(
+            api_key=api_key,
+            model_name=model,
+            system_prompt=system_prompt,
+            response_format={"type": "json_object"} if is_dict_mode else None,
+            app_name="EPUB-AI-Translator",
+            **(_DICTIONARY_SAMPLING if is_dict_mode else _TRANSLATION_SAMPLING),
+        )
+    )
+
+
+_PROVIDER_BUILDERS = {
+    "Google": _build_google,
+    "OpenRouter": _build_openrouter,
+}
+
+
+def build_provider(
+    provider_name: str,
+    api_key: str,
+    model: str,
+    system_prompt: str,
+    is_dict_mode: bool,
+    response_validator: Callable[[str], Any] | None = None,
+) -> ModelProvider:
+    """
+    provider 이름에 맞는 ModelProvider 인스턴스를 생성합니다.
+
+    :param provider_name: "Google" 또는 "OpenRouter"
+    :param api_key: API 키
+    :param model: 모델 이름
+    :param system_prompt: 시스템 프롬프트
+    :param is_dict_mode: True면 캐릭터 사전 생성용(JSON 응답, 낮은 temperature), False면 번역용 설정
+    :param response_validator: 응답 캐시에 저장하기 전에 응답을 검증하는 함수 (실패 시 예외 발생)
+    :returns: 생성된 ModelProvider
+    """
+    builder = _PROVIDER_BUILDERS.get(provider_name)
+    if builder is None:
+        raise ValueError(f"지원하지 않는 provider 입니다: {provider_name}")
+    instance = builder(api_key, model, system_prompt, is_dict_mode)
+    instance.response_validator = response_validator
+    return instance
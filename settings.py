@@ -25,3 +25,16 @@ ROSETTA = {
     "top_k": 64,
     "text_block_size": 10000
 }
+
+# 캐릭터 사전 생성 시 모델에 보내는 원문 최대 글자 수. 모델 컨텍스트를 넘는 요청은 어차피 실패하므로
+# 이 길이에 도달하면 추출을 멈추고 나머지 챕터는 파싱하지 않음
+CHARACTER_DICT = {
+    "max_chars": 500000
+}
+
+# LLM 응답 캐시 (동일 설정 + 동일 프롬프트 재요청 시 API 호출 생략)
+LLM_CACHE = {
+    "enabled": True,
+    "ttl_seconds": 30 * 24 * 60 * 60,
+    "max_entries": 100000
+}
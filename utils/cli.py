@@ -1,21 +1,27 @@
-import json
-import os
+import functools
 from pathlib import Path
 
-from google import genai
+import settings
 
 from utils.utils import get_api_key, get_workspace
 from epub import Epub
-from dictionary import parse_dictionary_json, load_full_text_from_epub
+from dictionary import (
+    EPUB_FINGERPRINT_KEY,
+    dump_dictionary_json,
+    epub_fingerprint,
+    load_full_text_from_epub,
+    parse_dictionary_json,
+    save_dictionary_file,
+)
 
-from provider import GoogleGenai, GoogleGenaiConfig, OpenRouter, OpenRouterConfig
+from provider import GoogleGenai, build_provider, close_shared_clients
 from prompts.dictionary import (
     CHARACTER_DICT_SYSTEM_PROMPT,
     CHARACTER_DICT_USER_PROMPT,
     CHARACTER_DICT_SYSTEM_PROMPT_QWEN,
     CHARACTER_DICT_USER_PROMPT_QWEN
 )
-from prompts.translation import base_prompt_instructions, base_prompt_text
+from prompts.translation import base_prompt_instructions, build_translation_prompt
 
 # cli utils
 def select_provider(provider_select: str|None = None) -> str:
@@ -23,13 +29,12 @@ def select_provider(provider_select: str|None = None) -> str:
     if provider_select in provider_list:
         return provider_select
 
-    print("사용할 모델 제공자를 선택하세요:")
-    for p in enumerate(provider_list, start=1):
-        print(f"{p[0]}. {p[1]}")
+    print("사용할 모델 제공자를 선택하세요:\n" + "\n".join(f"{i}. {p}" for i, p in enumerate(provider_list, start=1)))
 
+    provider_count = len(provider_list)
     while True:
         provider_select = input("Provider: ")
-        if provider_select.isdigit() and 1 <= int(provider_select) <= len(provider_list):
+        if provider_select.isdigit() and 1 <= int(provider_select) <= provider_count:
             return provider_list[int(provider_select)-1]
         elif provider_select in provider_list:
             return provider_select
@@ -37,12 +42,13 @@ def select_provider(provider_select: str|None = None) -> str:
             print("잘못된 입력입니다. 다시 입력하십시오.")
 
 def select_model(available_models: list[str]) -> str:
-    print("사용 가능한 모델 목록:")
-    for m in enumerate(available_models, start=1):
-        print(f"{m[0]}. {m[1]}")
+    # 모델이 수백 개일 수 있으므로 목록 전체를 한 번에 출력
+    print("사용 가능한 모델 목록:\n" + "\n".join(f"{i}. {m}" for i, m in enumerate(available_models, start=1)))
+
+    model_count = len(available_models)
     while True:
         model_select = input("모델: ")
-        if model_select.isdigit() and 1 <= int(model_select) <= len(available_models):
+        if model_select.isdigit() and 1 <= int(model_select) <= model_count:
             return available_models[int(model_select)-1]
         else:
             print("잘못된 입력입니다. 다시 입력하십시오.")
@@ -86,12 +92,14 @@ class RunWorker:
         self.translate_model = None
         self.char_dict = None
         self.epub_extracted = None
+        self.max_workers = 10
 
         self.full_text = ""
 
     def _load_full_text(self) -> None:
-        self.epub_extracted = Epub(self.epub_file_path, get_workspace())
-        self.full_text = load_full_text_from_epub(self.epub_extracted)
+        if self.epub_extracted is None:
+            self.epub_extracted = Epub(self.epub_file_path, get_workspace())
+        self.full_text = load_full_text_from_epub(self.epub_extracted, max_chars=settings.CHARACTER_DICT["max_chars"])
 
     def _ensure_key(self, env_name: str) -> str:
         self.key = get_api_key(env_name) if self.key is None else self.key
@@ -103,27 +111,34 @@ class RunWorker:
         return self.key
 
     def prepare_character_dictionary(self) -> None:
-        self._load_full_text()
+        self.epub_extracted = Epub(self.epub_file_path, get_workspace())
 
         if self.char_dict_path.exists():
             print(f"기존 캐릭터 사전이 발견되었습니다: {self.char_dict_path}")
-            load_dict = yn_check(self.yes, "기존 캐릭터 사전을 로드하시겠습니까?")
-
-            if load_dict:
-                try:
-                    with open(self.char_dict_path, "r", encoding="utf-8") as f:
-                        self.char_dict = json.load(f)
-                    parse_dictionary_json(json.dumps(self.char_dict, ensure_ascii=False))
+            try:
+                # 파일 원문을 한 번만 읽어 검증과 파싱을 함께 수행
+                loaded_dict = parse_dictionary_json(self.char_dict_path.read_text(encoding="utf-8"))
+            except Exception as e:
+                print(f"기존 캐릭터 사전 로드 실패: {e}")
+                loaded_dict = None
+
+            if loaded_dict is not None:
+                # 같은 EPUB으로 생성된 사전이면 확인 없이 바로 재사용
+                if loaded_dict.get(EPUB_FINGERPRINT_KEY) == epub_fingerprint(self.epub_file_path):
+                    print("EPUB 파일이 사전 생성 당시와 동일합니다.")
+                    load_dict = True
+                else:
+                    load_dict = yn_check(self.yes, "기존 캐릭터 사전을 로드하시겠습니까?")
+
+                if load_dict:
+                    self.char_dict = loaded_dict
                     print(f"기존 캐릭터 사전을 로드했습니다: {self.char_dict_path}")
-                except Exception as e:
-                    print(f"기존 캐릭터 사전 로드 실패: {e}")
-                    self.char_dict = None
 
         if self.char_dict is None:
             print("캐릭터 사전 파일을 찾을 수 없습니다.")
             if not yn_check(self.yes, "캐릭터 사전을 새로 생성하시겠습니까?"):
                 print("프로그램을 종료합니다.")
-                os._exit(1)
+                raise SystemExit(1)
 
             self.dict_provider = select_provider(self.provider_select)
             self.dict_model = None
@@ -156,7 +171,7 @@ class RunWorker:
 
             else:
                 print("알 수 없는 모델 제공자입니다.")
-                os._exit(1)
+                raise SystemExit(1)
 
             print("선택을 확인합니다.")
             print(f"EPUB 파일: {self.epub_file_path}")
@@ -165,60 +180,36 @@ class RunWorker:
 
             if not yn_check(self.yes, "위 선택으로 캐릭터 사전을 생성하시겠습니까?"):
                 print("프로그램을 종료합니다.")
-                os._exit(1)
+                raise SystemExit(1)
 
-            if self.dict_provider == "Google":
-                if self.key is None or self.dict_model is None:
-                    raise ValueError("캐릭터 사전 생성을 위한 모델/키 설정이 올바르지 않습니다.")
-
-                instance = GoogleGenai(
-                    config=GoogleGenaiConfig(
-                        api_key=self.key,
-                        model_name=self.dict_model,
-                        generation_config=genai.types.GenerateContentConfig(
-                            system_instruction=CHARACTER_DICT_SYSTEM_PROMPT,
-                            temperature=0.2,
-                            top_p=0.8,
-                            top_k=40,
-                            response_mime_type="application/json",
-                        ),
-                    )
-                )
+            # 원문 전체 텍스트는 사전을 새로 생성할 때만 필요하므로 이 시점에 로드
+            self._load_full_text()
 
-                response_text = instance.generate_content(
-                    user_prompt=CHARACTER_DICT_USER_PROMPT.format(novel_text=self.full_text)
-                )
-                self.char_dict = parse_dictionary_json(response_text)
-
-            elif self.dict_provider == "OpenRouter":
+            if self.dict_provider in {"Google", "OpenRouter"}:
                 if self.key is None or self.dict_model is None:
                     raise ValueError("캐릭터 사전 생성을 위한 모델/키 설정이 올바르지 않습니다.")
 
                 system_prompt = CHARACTER_DICT_SYSTEM_PROMPT
-                user_prompt = CHARACTER_DICT_USER_PROMPT.format(novel_text=self.full_text)
-
+                user_prompt_template = CHARACTER_DICT_USER_PROMPT
                 if self.dict_model == "qwen/qwen3-max-thinking":
                     system_prompt = CHARACTER_DICT_SYSTEM_PROMPT_QWEN
-                    user_prompt = CHARACTER_DICT_USER_PROMPT_QWEN.format(novel_text=self.full_text)
-
-                instance = OpenRouter(
-                    config=OpenRouterConfig(
-                        api_key=self.key,
-                        model_name=self.dict_model,
-                        system_prompt=system_prompt,
-                        temperature=0.2,
-                        top_p=0.8,
-                        response_format={"type": "json_object"},
-                        app_name="EPUB-AI-Translator",
-                    )
-                )
+                    user_prompt_template = CHARACTER_DICT_USER_PROMPT_QWEN
 
-                response_text = instance.generate_content(user_prompt=user_prompt)
+                instance = build_provider(
+                    self.dict_provider, self.key, self.dict_model, system_prompt,
+                    is_dict_mode=True, response_validator=parse_dictionary_json,
+                )
+                response_text = instance.generate_content(
+                    user_prompt=user_prompt_template.format(novel_text=self.full_text)
+                )
                 self.char_dict = parse_dictionary_json(response_text)
 
-            if yn_check(self.yes, "캐릭터 사전이 새로 생성되었습니다.\n사전을 파일로 저장하겠습니까?"):
-                with open(self.char_dict_path, "w", encoding="utf-8") as f:
-                    json.dump(self.char_dict, f, ensure_ascii=False, indent=2)
+            # 사전 생성이 끝나면 원문 텍스트는 더 쓰이지 않으므로 해제
+            self.full_text = ""
+
+            if self.char_dict is not None and yn_check(self.yes, "캐릭터 사전이 새로 생성되었습니다.\n사전을 파일로 저장하겠습니까?"):
+                self.char_dict[EPUB_FINGERPRINT_KEY] = epub_fingerprint(self.epub_file_path)
+                save_dictionary_file(self.char_dict_path, self.char_dict)
 
     def setup_translation_model(self) -> None:
         if self.dict_provider is None or self.dict_model is None:
@@ -253,10 +244,15 @@ class RunWorker:
                 print("Copilot 모델 제공자는 아직 구현되지 않았습니다.")
             else:
                 print("알 수 없는 모델 제공자입니다.")
-                os._exit(1)
+                raise SystemExit(1)
+
+        # 대화형 입력은 번역 모델을 생성하기 전에 모두 받아 둠 (병렬 번역은 현재 Google만 실행)
+        if self.translate_provider == "Google":
+            max_workers_input = input("병렬 워커 수를 입력하세요 (기본: 10): ").strip()
+            self.max_workers = int(max_workers_input) if max_workers_input.isdigit() and int(max_workers_input) > 0 else 10
 
     def run_translation(self) -> None:
-        from epub import repackage_epub, translate_epub as run_translate_epub
+        from epub import repackage_epub, translate_epub as run_translate_epub, validate_translated_chunk
 
         if self.translate_provider == "Google":
             if self.key is None or self.translate_model is None:
@@ -264,33 +260,24 @@ class RunWorker:
             if self.epub_extracted is None:
                 raise ValueError("EPUB 추출 정보가 없습니다.")
 
-            char_dict_text = json.dumps(self.char_dict, ensure_ascii=False, indent=2)
+            # 사람이 읽을 용도가 아니므로 들여쓰기 없이 직렬화하여 매 요청의 시스템 프롬프트 크기를 줄임
+            char_dict_text = dump_dictionary_json(self.char_dict, compact=True)
             translation_system_prompt = base_prompt_instructions.format(char_dict_text=char_dict_text)
 
-            translate_instance = GoogleGenai(
-                config=GoogleGenaiConfig(
-                    api_key=self.key,
-                    model_name=self.translate_model,
-                    generation_config=genai.types.GenerateContentConfig(
-                        system_instruction=translation_system_prompt,
-                        temperature=0.7,
-                        top_p=0.9,
-                        top_k=40,
-                    ),
-                )
+            translate_instance = build_provider(
+                self.translate_provider, self.key, self.translate_model, translation_system_prompt, is_dict_mode=False
             )
 
             def translate_fn(chunk_text: str, prev_context: str) -> str:
-                user_prompt = base_prompt_text.format(
-                    prev_context=prev_context,
-                    current_text=chunk_text,
+                user_prompt = build_translation_prompt(prev_context, chunk_text)
+                # 마커가 빠진 응답은 응답 캐시에 저장되지 않도록 검증 (실패 시 translate_epub이 대체 매핑 후 다음 실행에서 재요청)
+                result = translate_instance.generate_content(
+                    user_prompt=user_prompt,
+                    response_validator=functools.partial(validate_translated_chunk, chunk_text=chunk_text),
                 )
-                result = translate_instance.generate_content(user_prompt=user_prompt)
                 return result
 
-            max_workers_input = input("병렬 워커 수를 입력하세요 (기본: 10): ").strip()
-            max_workers = int(max_workers_input) if max_workers_input.isdigit() and int(max_workers_input) > 0 else 10
-
+            max_workers = self.max_workers
             print(f"\nEPUB 번역을 시작합니다... (chunk 최대 8000자, 병렬 워커 {max_workers}개)")
             output_dir = run_translate_epub(
                 epub=self.epub_extracted,
@@ -308,7 +295,11 @@ class RunWorker:
             print("OpenRouter 번역이 아직 구현되지 않았습니다.")
 
     def execute(self) -> None:
-        self.prepare_character_dictionary()
-        self.setup_translation_model()
-        self.run_translation()
+        try:
+            self.prepare_character_dictionary()
+            self.setup_translation_model()
+            self.run_translation()
+        finally:
+            # 중도 종료(SystemExit) 시에도 커넥션 풀과 응답 캐시 DB를 정상적으로 닫음
+            close_shared_clients()
 
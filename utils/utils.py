@@ -1,13 +1,13 @@
 import os
 import io
+import functools
 from pathlib import Path
 from zipfile import ZipFile
 
-from PIL import Image
-
 import settings
 
 # 함수 utils
+@functools.lru_cache(maxsize=1)
 def get_workspace() -> Path:
     workspace = Path.home() / ".epub_ai_translator"
     workspace.mkdir(parents=True, exist_ok=True)
@@ -23,6 +23,8 @@ def get_api_key(key_name: str) -> str:
     return key
 
 def zip_to_pdf(zip_bytes: bytes) -> bytes:
+    from PIL import Image
+
     zip_data = io.BytesIO(zip_bytes)
     
     with ZipFile(zip_data, 'r') as zip_ref:
@@ -34,16 +36,26 @@ def zip_to_pdf(zip_bytes: bytes) -> bytes:
         if not img_files:
             raise ValueError("이미지 파일이 ZIP 내에 존재하지 않습니다.")
 
+        def to_rgb(img):
+            # JPEG는 디코딩 단계에서 바로 RGB로 풀도록 요청하고, 이미 RGB인 이미지는 변환(복사)을 생략
+            if img.format == 'JPEG':
+                img.draft('RGB', img.size)
+            if img.mode != 'RGB':
+                return img.convert('RGB')
+            # PDF 저장은 with 블록(파일 핸들)이 닫힌 뒤에 픽셀을 읽으므로 여기서 미리 디코딩해 둠
+            img.load()
+            return img
+
         def image_generator():
             for file_name in img_files[1:]:
                 with zip_ref.open(file_name) as f:
                     with Image.open(f) as img:
-                        yield img.convert('RGB')
+                        yield to_rgb(img)
 
 
         with zip_ref.open(img_files[0]) as first_f:
             with Image.open(first_f) as first_img:
-                rgb_first = first_img.convert('RGB')
+                rgb_first = to_rgb(first_img)
                 
                 output_buf = io.BytesIO()
                 rgb_first.save(
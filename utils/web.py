@@ -1,19 +1,26 @@
-import json
+import functools
 from pathlib import Path
 from typing import Callable
 
-from google import genai
+import settings
 
-from dictionary import load_full_text_from_epub, parse_dictionary_json
-from epub import Epub, repackage_epub, translate_epub
+from dictionary import (
+    EPUB_FINGERPRINT_KEY,
+    dump_dictionary_json,
+    epub_fingerprint,
+    load_full_text_from_epub,
+    parse_dictionary_json,
+    save_dictionary_file,
+)
+from epub import Epub, repackage_epub, translate_epub, validate_translated_chunk
 from prompts.dictionary import (
     CHARACTER_DICT_SYSTEM_PROMPT,
     CHARACTER_DICT_SYSTEM_PROMPT_QWEN,
     CHARACTER_DICT_USER_PROMPT,
     CHARACTER_DICT_USER_PROMPT_QWEN,
 )
-from prompts.translation import base_prompt_instructions, base_prompt_text
-from provider import GoogleGenai, GoogleGenaiConfig, OpenRouter, OpenRouterConfig
+from prompts.translation import base_prompt_instructions, build_translation_prompt
+from provider import build_provider
 from utils.utils import get_api_key, get_workspace
 
 OPENROUTER_MODELS = {
@@ -54,56 +61,30 @@ def generate_character_dictionary(
     if progress_logger is not None:
         progress_logger("EPUB 추출 및 원문 로딩 시작")
     epub_extracted = Epub(epub_path, get_workspace())
-    full_text = load_full_text_from_epub(epub_extracted)
+    full_text = load_full_text_from_epub(epub_extracted, max_chars=settings.CHARACTER_DICT["max_chars"])
     if progress_logger is not None:
         progress_logger("원문 로딩 완료, 캐릭터 사전 생성 요청")
 
-    if provider == "Google":
-        instance = GoogleGenai(
-            config=GoogleGenaiConfig(
-                api_key=api_key,
-                model_name=model,
-                generation_config=genai.types.GenerateContentConfig(
-                    system_instruction=CHARACTER_DICT_SYSTEM_PROMPT,
-                    temperature=0.2,
-                    top_p=0.8,
-                    top_k=40,
-                    response_mime_type="application/json",
-                ),
-            )
-        )
-        response_text = instance.generate_content(
-            user_prompt=CHARACTER_DICT_USER_PROMPT.format(novel_text=full_text)
-        )
-        char_dict = parse_dictionary_json(response_text)
-    else:
-        system_prompt = CHARACTER_DICT_SYSTEM_PROMPT
-        user_prompt = CHARACTER_DICT_USER_PROMPT.format(novel_text=full_text)
-
-        if model == "qwen/qwen3-max-thinking":
-            system_prompt = CHARACTER_DICT_SYSTEM_PROMPT_QWEN
-            user_prompt = CHARACTER_DICT_USER_PROMPT_QWEN.format(novel_text=full_text)
-
-        instance = OpenRouter(
-            config=OpenRouterConfig(
-                api_key=api_key,
-                model_name=model,
-                system_prompt=system_prompt,
-                temperature=0.2,
-                top_p=0.8,
-                response_format={"type": "json_object"},
-                app_name="EPUB-AI-Translator",
-            )
-        )
-        response_text = instance.generate_content(user_prompt=user_prompt)
-        char_dict = parse_dictionary_json(response_text)
+    system_prompt = CHARACTER_DICT_SYSTEM_PROMPT
+    user_prompt_template = CHARACTER_DICT_USER_PROMPT
+    if model == "qwen/qwen3-max-thinking":
+        system_prompt = CHARACTER_DICT_SYSTEM_PROMPT_QWEN
+        user_prompt_template = CHARACTER_DICT_USER_PROMPT_QWEN
+
+    instance = build_provider(
+        provider, api_key, model, system_prompt, is_dict_mode=True, response_validator=parse_dictionary_json
+    )
+    response_text = instance.generate_content(
+        user_prompt=user_prompt_template.format(novel_text=full_text)
+    )
+    char_dict = parse_dictionary_json(response_text)
 
     char_dict_path = _get_char_dict_path(epub_path)
     if save_to_file:
         if progress_logger is not None:
             progress_logger("캐릭터 사전 파일 저장")
-        with open(char_dict_path, "w", encoding="utf-8") as f:
-            json.dump(char_dict, f, ensure_ascii=False, indent=2)
+        char_dict[EPUB_FINGERPRINT_KEY] = epub_fingerprint(epub_path)
+        save_dictionary_file(char_dict_path, char_dict)
 
     if progress_logger is not None:
         progress_logger("캐릭터 사전 생성 완료")
@@ -126,6 +107,7 @@ def translate_epub_with_dictionary(
     max_chars: int = 8000,
     max_workers: int = 10,
     progress_logger: Callable[[str], None] | None = None,
+    progress_callback: Callable[[int, int, str], None] | None = None,
 ) -> dict:
     if provider not in {"Google", "OpenRouter"}:
         raise ValueError("현재 번역은 Google/OpenRouter만 지원합니다.")
@@ -138,51 +120,31 @@ def translate_epub_with_dictionary(
         char_dict_path = _get_char_dict_path(epub_path)
         if not char_dict_path.exists():
             raise FileNotFoundError(f"캐릭터 사전 파일이 없습니다: {char_dict_path}")
-        with open(char_dict_path, "r", encoding="utf-8") as f:
-            char_dict = json.load(f)
-        parse_dictionary_json(json.dumps(char_dict, ensure_ascii=False))
+        # 파일 원문을 한 번만 읽어 검증과 파싱을 함께 수행
+        char_dict = parse_dictionary_json(char_dict_path.read_text(encoding="utf-8"))
         if progress_logger is not None:
             progress_logger("캐릭터 사전 로드 완료")
 
-    char_dict_text = json.dumps(char_dict, ensure_ascii=False, indent=2)
+    # 사람이 읽을 용도가 아니므로 들여쓰기 없이 직렬화하여 매 요청의 시스템 프롬프트 크기를 줄임
+    char_dict_text = dump_dictionary_json(char_dict, compact=True)
+
     translation_system_prompt = base_prompt_instructions.format(char_dict_text=char_dict_text)
 
-    if provider == "Google":
-        translate_instance = GoogleGenai(
-            config=GoogleGenaiConfig(
-                api_key=api_key,
-                model_name=model,
-                generation_config=genai.types.GenerateContentConfig(
-                    system_instruction=translation_system_prompt,
-                    temperature=0.7,
-                    top_p=0.9,
-                    top_k=40,
-                ),
-            )
-        )
-    else:
-        translate_instance = OpenRouter(
-            config=OpenRouterConfig(
-                api_key=api_key,
-                model_name=model,
-                system_prompt=translation_system_prompt,
-                temperature=0.7,
-                top_p=0.9,
-                app_name="EPUB-AI-Translator",
-            )
-        )
+    translate_instance = build_provider(provider, api_key, model, translation_system_prompt, is_dict_mode=False)
 
     def translate_fn(chunk_text: str, prev_context: str) -> str:
-        user_prompt = base_prompt_text.format(
-            prev_context=prev_context,
-            current_text=chunk_text,
+        user_prompt = build_translation_prompt(prev_context, chunk_text)
+        # 마커가 빠진 응답은 응답 캐시에 저장되지 않도록 검증
+        return translate_instance.generate_content(
+            user_prompt=user_prompt,
+            response_validator=functools.partial(validate_translated_chunk, chunk_text=chunk_text),
         )
-        return translate_instance.generate_content(user_prompt=user_prompt)
 
     def file_progress(current: int, total: int, file_name: str) -> None:
-        if progress_logger is None:
-            return
-        progress_logger(f"번역 진행 {current}/{total}: {file_name}")
+        if progress_callback is not None:
+            progress_callback(current, total, file_name)
+        if progress_logger is not None:
+            progress_logger(f"번역 진행 {current}/{total}: {file_name}")
 
     if progress_logger is not None:
         progress_logger("EPUB 추출 및 번역 시작")
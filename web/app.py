@@ -1,11 +1,16 @@
-from fastapi import FastAPI, Request , UploadFile, File
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Request , UploadFile, File
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 from pathlib import Path
-import shutil
+import asyncio
+import functools
 import json
+import os
+import re
 import uuid
+from collections import deque
 from datetime import datetime
 from threading import Lock
 from concurrent.futures import ThreadPoolExecutor
@@ -15,6 +20,7 @@ from utils.utils import get_workspace
 from provider import GoogleGenai
 from utils.utils import get_api_key
 from utils.web import generate_character_dictionary, translate_epub_with_dictionary
+from dictionary import load_dictionary_file, save_dictionary_file
 
 app = FastAPI()
 TASK_EXECUTOR = ThreadPoolExecutor(max_workers=2)
@@ -34,6 +40,69 @@ GOOGLE_FALLBACK_MODELS = [
     "gemini-2.5-flash",
     "gemini-2.0-flash",
 ]
+# 업로드 파일을 디스크에 옮겨 쓸 때 한 번에 읽는 크기
+_UPLOAD_CHUNK_SIZE = 1024 * 1024
+_TASK_LOG_LIMIT = 100
+# 업로드 요청 본문의 최대 크기. 이를 넘는 요청은 본문을 읽기 전에(Content-Length) 또는 저장 도중에 거부
+MAX_EPUB_BYTES = 100 * 1024 * 1024
+_EPUB_NAME_RE = re.compile(r"(?i)\.epub\Z")
+# EPUB은 ZIP 컨테이너이므로 로컬 파일 헤더 시그니처로 시작해야 함
+_ZIP_MAGIC = b"PK\x03\x04"
+
+def _payload_too_large() -> JSONResponse:
+    return JSONResponse(
+        status_code=413,
+        content={"status": "error", "message": f"파일이 너무 큽니다. (최대 {MAX_EPUB_BYTES // (1024 * 1024)}MB)"},
+    )
+
+
+class _RequestBodyTooLarge(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=413)
+
+
+class _BodySizeLimitMiddleware:
+    """
+    요청 본문 크기를 MAX_EPUB_BYTES로 제한하는 ASGI 미들웨어.
+    Content-Length가 상한을 넘으면 본문을 읽지 않고 바로 거부하고, 헤더가 없는(chunked) 본문은
+    receive로 들어오는 바이트를 세어 상한을 넘는 즉시 중단하므로 multipart 파서가 본문 전체를 스풀하지 않습니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > MAX_EPUB_BYTES:
+            await _payload_too_large()(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > MAX_EPUB_BYTES:
+                    # FastAPI는 본문 파싱 중 발생한 HTTPException을 그대로 전달하므로 아래 핸들러가 413으로 응답
+                    raise _RequestBodyTooLarge()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+app.add_middleware(_BodySizeLimitMiddleware)
+
+
+@app.exception_handler(_RequestBodyTooLarge)
+async def _request_body_too_large_handler(request: Request, exc: _RequestBodyTooLarge):
+    return _payload_too_large()
+
 
 templates = Jinja2Templates(directory=Path(__file__).parent / "templates")
 app.mount("/static", StaticFiles(directory=Path(__file__).parent / "static"), name="static")
@@ -43,16 +112,36 @@ def get_character_dictionary_path(epub_filename: str) -> Path:
     return UPLOAD_DIR / f"{Path(epub_filename).stem}_character_dictionary.json"
 
 
+# 업로드 디렉터리 목록 스냅샷. 앱이 업로드/사전 저장/번역 결과를 쓸 때는 명시적으로 무효화하고,
+# 앱 밖에서 바뀐 경우는 디렉터리 mtime으로 감지해 glob과 사전 파일 존재 확인을 다시 함
+# (타임스탬프 해상도가 낮은 파일시스템에서는 mtime만으로 변경을 놓칠 수 있으므로 mtime은 보조 수단)
+_UPLOAD_SNAPSHOT_LOCK = Lock()
+_upload_snapshot_mtime_ns: int | None = None
+_upload_snapshot: list[dict[str, str | bool]] = []
+
+
+def _invalidate_upload_snapshot() -> None:
+    global _upload_snapshot_mtime_ns
+
+    with _UPLOAD_SNAPSHOT_LOCK:
+        _upload_snapshot_mtime_ns = None
+
+
 def get_uploaded_epub_items() -> list[dict[str, str | bool]]:
-    items: list[dict[str, str | bool]] = []
-    for path in sorted(UPLOAD_DIR.glob("*.epub")):
-        items.append(
-            {
-                "filename": path.name,
-                "has_character_dictionary": get_character_dictionary_path(path.name).exists(),
-            }
-        )
-    return items
+    global _upload_snapshot_mtime_ns, _upload_snapshot
+
+    mtime_ns = UPLOAD_DIR.stat().st_mtime_ns
+    with _UPLOAD_SNAPSHOT_LOCK:
+        if mtime_ns != _upload_snapshot_mtime_ns:
+            _upload_snapshot = [
+                {
+                    "filename": path.name,
+                    "has_character_dictionary": get_character_dictionary_path(path.name).exists(),
+                }
+                for path in sorted(UPLOAD_DIR.glob("*.epub"))
+            ]
+            _upload_snapshot_mtime_ns = mtime_ns
+        return [dict(item) for item in _upload_snapshot]
 
 
 def get_dashboard_models(provider_name: str) -> list[str]:
@@ -90,6 +179,10 @@ class TranslationRunRequest(BaseModel):
     max_workers: int = 10
 
 
+class PipelineRunRequest(TranslationRunRequest):
+    save_to_file: bool = True
+
+
 class CharacterDictSaveRequest(BaseModel):
     epub_filename: str
     content: dict | list
@@ -101,28 +194,31 @@ def _now_iso() -> str:
 
 def create_task(task_type: str) -> str:
     task_id = uuid.uuid4().hex
+    now = _now_iso()
     with TASK_LOCK:
         TASKS[task_id] = {
             "task_id": task_id,
             "task_type": task_type,
             "status": "queued",
             "progress": 0,
-            "logs": [f"[{_now_iso()}] 작업 대기 중"],
+            # 최근 로그 100개만 유지 (가장 오래된 항목은 append 시 자동으로 제거됨)
+            "logs": deque([f"[{now}] 작업 대기 중"], maxlen=_TASK_LOG_LIMIT),
             "result": None,
             "error": None,
-            "started_at": _now_iso(),
+            "started_at": now,
             "finished_at": None,
         }
     return task_id
 
 
 def append_task_log(task_id: str, message: str) -> None:
+    # 시각 포맷은 잠금 밖에서 미리 수행하여 잠금 구간을 append 한 번으로 줄임
+    line = f"[{_now_iso()}] {message}"
     with TASK_LOCK:
         task = TASKS.get(task_id)
         if task is None:
             return
-        task["logs"].append(f"[{_now_iso()}] {message}")
-        task["logs"] = task["logs"][-100:]
+        task["logs"].append(line)
 
 
 def update_task(task_id: str, **kwargs) -> None:
@@ -138,7 +234,9 @@ def get_task(task_id: str) -> dict | None:
         task = TASKS.get(task_id)
         if task is None:
             return None
-        return dict(task)
+        snapshot = dict(task)
+        snapshot["logs"] = list(task["logs"])
+        return snapshot
 
 
 def _run_character_dict_task(task_id: str, request: CharacterDictRunRequest) -> None:
@@ -173,23 +271,24 @@ def _run_character_dict_task(task_id: str, request: CharacterDictRunRequest) ->
         append_task_log(task_id, f"오류: {e}")
 
 
-def _run_translation_task(task_id: str, request: TranslationRunRequest) -> None:
+def _run_translation_task(task_id: str, request: TranslationRunRequest, char_dict: dict | None = None) -> None:
     update_task(task_id, status="running", progress=5)
     append_task_log(task_id, "번역 작업 시작")
 
     def progress_logger(message: str) -> None:
         append_task_log(task_id, message)
-        if "번역 진행" in message:
-            try:
-                progress_token = message.split("번역 진행 ", 1)[1].split(":", 1)[0]
-                current_text, total_text = progress_token.split("/")
-                current = int(current_text)
-                total = int(total_text)
-                if total > 0:
-                    progress_value = min(95, 10 + int((current / total) * 80))
-                    update_task(task_id, progress=progress_value)
-            except Exception:
-                pass
+
+    last_progress = 5
+
+    def progress_callback(current: int, total: int, file_name: str) -> None:
+        nonlocal last_progress
+        if total <= 0:
+            return
+        # 파일 수가 많으면 대부분의 콜백이 같은 퍼센트를 가리키므로 값이 바뀔 때만 잠금을 잡고 갱신
+        progress_value = min(95, 10 + int((current / total) * 80))
+        if progress_value != last_progress:
+            last_progress = progress_value
+            update_task(task_id, progress=progress_value)
 
     try:
         epub_path = resolve_upload_epub_path(request.epub_filename)
@@ -198,10 +297,12 @@ def _run_translation_task(task_id: str, request: TranslationRunRequest) -> None:
             provider=request.provider,
             model=request.model,
             key=request.key,
+            char_dict=char_dict,
             target_lang=request.target_lang,
             max_chars=request.max_chars,
             max_workers=request.max_workers,
             progress_logger=progress_logger,
+            progress_callback=progress_callback,
         )
         update_task(
             task_id,
@@ -221,9 +322,33 @@ def _run_translation_task(task_id: str, request: TranslationRunRequest) -> None:
         append_task_log(task_id, f"오류: {e}")
 
 
+def _run_pipeline_task(task_id: str, request: PipelineRunRequest) -> None:
+    """캐릭터 사전 생성이 끝나면 대시보드의 추가 요청 없이 같은 작업에서 바로 번역을 이어서 실행"""
+    update_task(task_id, status="running", progress=1)
+    append_task_log(task_id, "캐릭터 사전 생성 시작")
+
+    try:
+        epub_path = resolve_upload_epub_path(request.epub_filename)
+        dict_result = generate_character_dictionary(
+            epub_path=epub_path,
+            provider=request.provider,
+            model=request.model,
+            key=request.key,
+            save_to_file=request.save_to_file,
+            progress_logger=lambda msg: append_task_log(task_id, msg),
+        )
+    except Exception as e:
+        update_task(task_id, status="error", error=str(e), finished_at=_now_iso())
+        append_task_log(task_id, f"오류: {e}")
+        return
+
+    # 생성된 사전을 그대로 넘겨 파일을 다시 읽고 파싱하지 않음
+    _run_translation_task(task_id, request, char_dict=dict_result["char_dict"])
+
+
 def resolve_upload_epub_path(epub_filename: str) -> Path:
     safe_epub_filename = Path(epub_filename).name
-    if not safe_epub_filename.lower().endswith(".epub"):
+    if not _EPUB_NAME_RE.search(safe_epub_filename):
         raise ValueError("유효한 EPUB 파일명이 아닙니다.")
 
     epub_path = UPLOAD_DIR / safe_epub_filename
@@ -265,7 +390,7 @@ def list_models(provider: str):
 @app.get("/character-dictionary")
 def get_character_dictionary(epub_filename: str):
     safe_epub_filename = Path(epub_filename).name
-    if not safe_epub_filename.lower().endswith(".epub"):
+    if not _EPUB_NAME_RE.search(safe_epub_filename):
         return {"status": "error", "message": "유효한 EPUB 파일명이 아닙니다."}
 
     dictionary_path = get_character_dictionary_path(safe_epub_filename)
@@ -273,9 +398,8 @@ def get_character_dictionary(epub_filename: str):
         return {"status": "error", "message": "character_dictionary.json 파일이 없습니다."}
 
     try:
-        with dictionary_path.open("r", encoding="utf-8") as file:
-            content = json.load(file)
-    except json.JSONDecodeError:
+        content = load_dictionary_file(dictionary_path)
+    except json.JSONDecodeError:  # orjson.JSONDecodeError도 이 예외의 하위 클래스
         return {"status": "error", "message": "JSON 파싱에 실패했습니다."}
 
     return {
@@ -289,28 +413,41 @@ def get_character_dictionary(epub_filename: str):
 @app.put("/character-dictionary")
 def save_character_dictionary(request: CharacterDictSaveRequest):
     safe_epub_filename = Path(request.epub_filename).name
-    if not safe_epub_filename.lower().endswith(".epub"):
+    if not _EPUB_NAME_RE.search(safe_epub_filename):
         return {"status": "error", "message": "유효한 EPUB 파일명이 아닙니다."}
 
     dictionary_path = get_character_dictionary_path(safe_epub_filename)
 
     try:
-        with dictionary_path.open("w", encoding="utf-8") as file:
-            json.dump(request.content, file, ensure_ascii=False, indent=2)
+        save_dictionary_file(dictionary_path, request.content)
+        _invalidate_upload_snapshot()
     except Exception as e:
         return {"status": "error", "message": f"저장 실패: {e}"}
 
     return {"status": "success", "message": "저장 완료"}
 
 
+async def _run_on_task_executor(func, /, **kwargs):
+    """
+    오래 걸리는 작업을 TASK_EXECUTOR에서 실행하고 결과를 기다립니다.
+    요청 처리용 공용 스레드풀을 점유하지 않으므로 동기 실행 엔드포인트가 몰려도 다른 요청이 지연되지 않습니다.
+    """
+    try:
+        return await asyncio.get_running_loop().run_in_executor(TASK_EXECUTOR, functools.partial(func, **kwargs))
+    finally:
+        # 사전/번역 결과 파일이 업로드 디렉터리에 쓰였을 수 있음
+        _invalidate_upload_snapshot()
+
+
 @app.post("/run/character-dictionary")
-def run_character_dictionary(request: CharacterDictRunRequest):
+async def run_character_dictionary(request: CharacterDictRunRequest):
     if request.provider not in PROVIDER_OPTIONS:
         return {"status": "error", "message": "유효하지 않은 provider 입니다."}
 
     try:
         epub_path = resolve_upload_epub_path(request.epub_filename)
-        result = generate_character_dictionary(
+        result = await _run_on_task_executor(
+            generate_character_dictionary,
             epub_path=epub_path,
             provider=request.provider,
             model=request.model,
@@ -336,18 +473,19 @@ def start_character_dictionary_task(request: CharacterDictRunRequest):
         return {"status": "error", "message": "유효하지 않은 provider 입니다."}
 
     task_id = create_task("character-dictionary")
-    TASK_EXECUTOR.submit(_run_character_dict_task, task_id, request)
+    TASK_EXECUTOR.submit(_run_character_dict_task, task_id, request).add_done_callback(lambda _: _invalidate_upload_snapshot())
     return {"status": "success", "task_id": task_id}
 
 
 @app.post("/run/translation")
-def run_translation(request: TranslationRunRequest):
+async def run_translation(request: TranslationRunRequest):
     if request.provider not in PROVIDER_OPTIONS:
         return {"status": "error", "message": "유효하지 않은 provider 입니다."}
 
     try:
         epub_path = resolve_upload_epub_path(request.epub_filename)
-        result = translate_epub_with_dictionary(
+        result = await _run_on_task_executor(
+            translate_epub_with_dictionary,
             epub_path=epub_path,
             provider=request.provider,
             model=request.model,
@@ -375,7 +513,17 @@ def start_translation_task(request: TranslationRunRequest):
         return {"status": "error", "message": "유효하지 않은 provider 입니다."}
 
     task_id = create_task("translation")
-    TASK_EXECUTOR.submit(_run_translation_task, task_id, request)
+    TASK_EXECUTOR.submit(_run_translation_task, task_id, request).add_done_callback(lambda _: _invalidate_upload_snapshot())
+    return {"status": "success", "task_id": task_id}
+
+
+@app.post("/tasks/full-pipeline")
+def start_pipeline_task(request: PipelineRunRequest):
+    if request.provider not in PROVIDER_OPTIONS:
+        return {"status": "error", "message": "유효하지 않은 provider 입니다."}
+
+    task_id = create_task("full-pipeline")
+    TASK_EXECUTOR.submit(_run_pipeline_task, task_id, request).add_done_callback(lambda _: _invalidate_upload_snapshot())
     return {"status": "success", "task_id": task_id}
 
 
@@ -392,13 +540,27 @@ async def upload_epub(file: UploadFile = File(...)):
         return {"status": "error", "message": "업로드된 파일이 EPUB 형식이 아닙니다."}
     if not file.filename:
         return {"status": "error", "message": "파일 이름이 없습니다."}
-    if file.filename.split(".")[-1].lower() != "epub":
+    if not _EPUB_NAME_RE.search(file.filename):
         return {"status": "error", "message": "파일 확장자가 .epub이 아닙니다."}
+    # 디스크에 쓰기 전에 파일 시그니처부터 확인하여 ZIP이 아닌 데이터는 바로 거부
+    if await file.read(len(_ZIP_MAGIC)) != _ZIP_MAGIC:
+        return {"status": "error", "message": "업로드된 파일이 EPUB 형식이 아닙니다."}
+    await file.seek(0)
 
     file_path = UPLOAD_DIR / Path(file.filename).name
-    
-    # 3. 파일 디스크에 저장
-    with file_path.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # 임시 파일에 다 쓴 뒤 교체하여, 저장 도중 중단되어도 같은 이름의 기존 업로드가 깨지지 않도록 함
+    part_path = file_path.with_name(file_path.name + ".part")
+
+    # 3. 파일 디스크에 저장 (청크 단위로 읽고 쓰기는 스레드풀에서 수행하여 업로드 중에도 이벤트 루프가 다른 요청을 처리)
+    # 크기 상한은 본문 수신 단계에서 _BodySizeLimitMiddleware가 적용함
+    try:
+        with part_path.open("wb") as buffer:
+            while chunk := await file.read(_UPLOAD_CHUNK_SIZE):
+                await run_in_threadpool(buffer.write, chunk)
+    except BaseException:
+        part_path.unlink(missing_ok=True)
+        raise
+    os.replace(part_path, file_path)
+    _invalidate_upload_snapshot()
 
     return {"status": "success", "filename": file.filename, "message": "업로드 성공!"}
\ No newline at end of file